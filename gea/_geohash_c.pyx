@@ -0,0 +1,202 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Aug 31 09:12:00 2026
+
+@author: Alessandro Adamo
+
+Optional C backend for gea.geohash. Build in place with:
+
+    cythonize -i gea/_geohash_c.pyx
+
+gea.geohash imports this module when present and falls back to the
+pure-Python implementation otherwise; set GEA_BACKEND=python in the
+environment to force the fallback.
+"""
+
+cdef const unsigned char* BASE32 = b'0123456789bcdefghjkmnpqrstuvwxyz'
+
+cdef int DECODEMAP[128]
+for _i in range(128):
+    DECODEMAP[_i] = -1
+for _i in range(32):
+    DECODEMAP[BASE32[_i]] = _i
+
+
+def encode(double lat, double lon, int precision):
+    """
+    Geohash encode a single latitude/longitude pair.
+
+    :param lat: latitude
+    :param lon: longitude
+    :param precision: length of the geohash string, at most 32
+    :return geohash string
+    """
+    cdef double lat_min = -90.0
+    cdef double lat_max = 90.0
+    cdef double lon_min = -180.0
+    cdef double lon_max = 180.0
+    cdef double mid
+    cdef int idx = 0
+    cdef int bit = 0
+    cdef int pos = 0
+    cdef bint even_bit = True
+    cdef char out[32]
+
+    if precision < 1 or precision > 32:
+        raise ValueError('Invalid precision')
+
+    while pos < precision:
+        if even_bit:
+            # bisect E-W longitude
+            mid = (lon_min + lon_max) / 2.0
+            if lon >= mid:
+                idx = 2 * idx + 1
+                lon_min = mid
+            else:
+                idx = 2 * idx
+                lon_max = mid
+        else:
+            # bisect N-S latitude
+            mid = (lat_min + lat_max) / 2.0
+            if lat >= mid:
+                idx = 2 * idx + 1
+                lat_min = mid
+            else:
+                idx = 2 * idx
+                lat_max = mid
+        even_bit = not even_bit
+
+        bit += 1
+        if bit == 5:
+            # next character
+            out[pos] = BASE32[idx]
+            pos += 1
+            bit = 0
+            idx = 0
+
+    return out[:precision].decode('ascii')
+
+
+def bounds(str geohash):
+    """
+    SW/NE bounds of the cell of a (lowercase) geohash.
+
+    :param geohash: geohash string
+    :return: (lat_min, lon_min, lat_max, lon_max) tuple
+    """
+    cdef double lat_min = -90.0
+    cdef double lat_max = 90.0
+    cdef double lon_min = -180.0
+    cdef double lon_max = 180.0
+    cdef bint even_bit = True
+    cdef int i, nn, idx, bit_n
+    cdef Py_UCS4 ch
+
+    for i in range(len(geohash)):
+        ch = geohash[i]
+        idx = DECODEMAP[ch] if ch < 128 else -1
+        if idx < 0:
+            raise KeyError(geohash[i])
+
+        for nn in range(4, -1, -1):
+            bit_n = (idx >> nn) & 1
+            if even_bit:
+                # longitude
+                if bit_n == 1:
+                    lon_min = (lon_min + lon_max) / 2.0
+                else:
+                    lon_max = (lon_min + lon_max) / 2.0
+            else:
+                # latitude
+                if bit_n == 1:
+                    lat_min = (lat_min + lat_max) / 2.0
+                else:
+                    lat_max = (lat_min + lat_max) / 2.0
+            even_bit = not even_bit
+
+    return lat_min, lon_min, lat_max, lon_max
+
+
+def decode(str geohash):
+    """
+    Centre of the cell of a (lowercase) geohash, without rounding.
+
+    :param geohash: geohash string
+    :return: (lat, lon) tuple
+    """
+    cdef double lat_min, lon_min, lat_max, lon_max
+
+    lat_min, lon_min, lat_max, lon_max = bounds(geohash)
+
+    return (lat_min + lat_max) / 2.0, (lon_min + lon_max) / 2.0
+
+
+def adjacent(str geohash, str direction):
+    """
+    Adjacent cell of a (lowercase) geohash in direction n/s/e/w.
+
+    :param geohash: geohash string, at most 12 characters
+    :param direction: direction from geohash (n/s/e/w)
+    :return geocode of adjacent cell
+    """
+    cdef int n = len(geohash)
+    cdef unsigned long long lat_int = 0
+    cdef unsigned long long lon_int = 0
+    cdef unsigned long long code = 0
+    cdef int lat_bits = 0
+    cdef int lon_bits = 0
+    cdef int dlat = 0
+    cdef int dlon = 0
+    cdef int i, k, v
+    cdef Py_UCS4 ch
+    cdef char out[12]
+
+    if n > 12:
+        raise ValueError('Invalid Geohash')
+
+    for i in range(n):
+        ch = geohash[i]
+        v = DECODEMAP[ch] if ch < 128 else -1
+        if v < 0:
+            raise KeyError(geohash[i])
+        if i % 2 == 0:
+            # character starts on a longitude bit
+            lon_int = (lon_int << 3) | (((v >> 4) & 1) << 2) | (((v >> 2) & 1) << 1) | (v & 1)
+            lat_int = (lat_int << 2) | (((v >> 3) & 1) << 1) | ((v >> 1) & 1)
+            lon_bits += 3
+            lat_bits += 2
+        else:
+            # character starts on a latitude bit
+            lat_int = (lat_int << 3) | (((v >> 4) & 1) << 2) | (((v >> 2) & 1) << 1) | (v & 1)
+            lon_int = (lon_int << 2) | (((v >> 3) & 1) << 1) | ((v >> 1) & 1)
+            lat_bits += 3
+            lon_bits += 2
+
+    if direction == 'n':
+        dlat = 1
+    elif direction == 's':
+        dlat = -1
+    elif direction == 'e':
+        dlon = 1
+    else:
+        dlon = -1
+
+    # step on the cell grid with modular wrap at the poles/antimeridian
+    lat_int = (lat_int + dlat) & ((1ULL << lat_bits) - 1)
+    lon_int = (lon_int + dlon) & ((1ULL << lon_bits) - 1)
+
+    # re-interleave, longitude bit first
+    for k in range(5 * n):
+        code <<= 1
+        if k % 2 == 0:
+            lon_bits -= 1
+            code |= (lon_int >> lon_bits) & 1
+        else:
+            lat_bits -= 1
+            code |= (lat_int >> lat_bits) & 1
+
+    for i in range(n):
+        out[i] = BASE32[(code >> (5 * (n - 1 - i))) & 0x1f]
+
+    return out[:n].decode('ascii')
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Aug 31 09:12:00 2026
+
+@author: Alessandro Adamo
+"""
+import math
+
+import numpy as np
+from numba import njit, prange
+
+__base32 = np.frombuffer(b'0123456789bcdefghjkmnpqrstuvwxyz', dtype=np.uint8)
+
+__decodemap = np.full(256, -1, dtype=np.int8)
+for _i, _c in enumerate(b'0123456789bcdefghjkmnpqrstuvwxyz'):
+    __decodemap[_c] = _i
+
+
+@njit(cache=True)
+def _encode_scalar(lat, lon, out):
+    """
+    Encode a single latitude/longitude pair into the preallocated uint8
+    buffer ``out``; one base32 character is emitted every 5 bits.
+
+    :param lat: latitude
+    :param lon: longitude
+    :param out: uint8 output buffer, one byte per geohash character
+    """
+    precision = out.shape[0]
+
+    idx = 0
+    bit = 0
+    even_bit = True
+    pos = 0
+
+    lat_min = -90.0
+    lat_max = 90.0
+    lon_min = -180.0
+    lon_max = 180.0
+
+    for _ in range(5 * precision):
+        if even_bit:
+            # bisect E-W longitude
+            lon_mid = (lon_min + lon_max) / 2.0
+            if lon >= lon_mid:
+                idx = 2 * idx + 1
+                lon_min = lon_mid
+            else:
+                idx = 2 * idx
+                lon_max = lon_mid
+        else:
+            # bisect N-S latitude
+            lat_mid = (lat_min + lat_max) / 2.0
+            if lat >= lat_mid:
+                idx = 2 * idx + 1
+                lat_min = lat_mid
+            else:
+                idx = 2 * idx
+                lat_max = lat_mid
+        even_bit = not even_bit
+
+        bit += 1
+        if bit == 5:
+            # next character
+            out[pos] = __base32[idx]
+            pos += 1
+            bit = 0
+            idx = 0
+
+
+@njit(cache=True)
+def _decode_scalar(code):
+    """
+    Decode one geohash, given as a uint8 character buffer, to the centre
+    of its cell.
+
+    :param code: uint8 buffer of base32 characters
+    :return: (lat, lon) centre of the cell
+    """
+    even_bit = True
+    lat_min = -90.0
+    lat_max = 90.0
+    lon_min = -180.0
+    lon_max = 180.0
+
+    for i in range(code.shape[0]):
+        idx = __decodemap[code[i]]
+        for nn in range(4, -1, -1):
+            bit_n = idx >> nn & 1
+            if even_bit:
+                # longitude
+                lon_mid = (lon_min + lon_max) / 2.0
+                if bit_n == 1:
+                    lon_min = lon_mid
+                else:
+                    lon_max = lon_mid
+            else:
+                # latitude
+                lat_mid = (lat_min + lat_max) / 2.0
+                if bit_n == 1:
+                    lat_min = lat_mid
+                else:
+                    lat_max = lat_mid
+
+            even_bit = not even_bit
+
+    return (lat_min + lat_max) / 2.0, (lon_min + lon_max) / 2.0
+
+
+@njit(cache=True, parallel=True)
+def _encode_array(lat, lon, out):
+    for i in prange(lat.shape[0]):
+        _encode_scalar(lat[i], lon[i], out[i])
+
+
+@njit(cache=True, parallel=True)
+def _decode_array(codes, lat_out, lon_out):
+    for i in prange(codes.shape[0]):
+        lat_out[i], lon_out[i] = _decode_scalar(codes[i])
+
+
+def encode(lat: float, lon: float, precision: int):
+    """
+    Geohash encode through the compiled kernel.
+
+    :param lat: latitude
+    :param lon: longitude
+    :param precision: length of the geohash string
+    :return geohash string
+    """
+    out = np.empty(precision, dtype=np.uint8)
+    _encode_scalar(lat, lon, out)
+    return out.tobytes().decode('ascii')
+
+
+def encode_array(lat, lon, precision: int):
+    """
+    Geohash encode arrays of coordinates through the parallel kernel.
+
+    :param lat: latitude array
+    :param lon: longitude array
+    :param precision: length of the geohash strings
+    :return: array of geohash byte strings of dtype S{precision}
+    """
+    lat = np.ascontiguousarray(lat, dtype=np.float64)
+    lon = np.ascontiguousarray(lon, dtype=np.float64)
+    out = np.empty((lat.shape[0], precision), dtype=np.uint8)
+    _encode_array(lat, lon, out)
+    return out.view(f'S{precision}').ravel()
+
+
+def decode_array(geohashes):
+    """
+    Geohash decode an array of byte strings through the parallel kernel.
+
+    :param geohashes: array of geohash byte strings of dtype S{precision}
+    :return: (lat, lon) float64 arrays of cell centres
+    """
+    geohashes = np.ascontiguousarray(geohashes)
+    precision = geohashes.dtype.itemsize
+    codes = geohashes.view(np.uint8).reshape(geohashes.shape[0], precision)
+
+    lat_out = np.empty(codes.shape[0], dtype=np.float64)
+    lon_out = np.empty(codes.shape[0], dtype=np.float64)
+    _decode_array(codes, lat_out, lon_out)
+
+    # round to close to centre, as in the scalar decode
+    lat_bits = 5 * precision // 2
+    lon_bits = 5 * precision - lat_bits
+    lat_digits = int(math.floor(2.0 - math.log(180.0 / 2 ** lat_bits) / math.log(10.0)))
+    lon_digits = int(math.floor(2.0 - math.log(360.0 / 2 ** lon_bits) / math.log(10.0)))
+
+    return np.round(lat_out, lat_digits), np.round(lon_out, lon_digits)
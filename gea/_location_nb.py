@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Aug 31 09:12:00 2026
+
+@author: Alessandro Adamo
+"""
+from math import sin, cos, asin, sqrt
+
+import numpy as np
+from numba import njit, prange
+
+_R = (2.0 * 6378137.0 + 6356752.3) / 3.0  # WGS84 mean radius
+
+
+@njit(cache=True, parallel=True, fastmath=True)
+def _haversine_array(lat1, lon1, lat2, lon2, out):
+    for i in prange(lat1.shape[0]):
+        dlat = lat2[i] - lat1[i]
+        dlon = lon2[i] - lon1[i]
+        sdlat = sin(dlat * 0.5)
+        sdlon = sin(dlon * 0.5)
+        a = sdlat * sdlat + cos(lat1[i]) * cos(lat2[i]) * sdlon * sdlon
+        out[i] = _R * 2.0 * asin(sqrt(a))
+
+
+def haversine_array(lat1, lon1, lat2, lon2, dtype=np.float64):
+    """
+    Haversine distance over coordinate arrays through the parallel kernel.
+
+    The kernel specializes per dtype; float32 halves memory traffic and
+    doubles the SIMD lanes.
+
+    :param lat1: latitude array expressed in radians
+    :param lon1: longitude array expressed in radians
+    :param lat2: latitude array expressed in radians
+    :param lon2: longitude array expressed in radians
+    :param dtype: float dtype of the computation
+    :return: array of Haversine distances
+    """
+    lat1 = np.ascontiguousarray(lat1, dtype=dtype)
+    lon1 = np.ascontiguousarray(lon1, dtype=dtype)
+    lat2 = np.ascontiguousarray(lat2, dtype=dtype)
+    lon2 = np.ascontiguousarray(lon2, dtype=dtype)
+    out = np.empty(lat1.shape[0], dtype=dtype)
+    _haversine_array(lat1, lon1, lat2, lon2, out)
+    return out
@@ -5,26 +5,121 @@ Created on Tue Oct 31 13:48:59 2017
 @author: Alessandro Adamo
 """
 import math
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+# compiled backends are optional; set GEA_BACKEND=python to force the
+# pure-Python implementation for debugging
+_c = None
+_nb = None
+if os.environ.get('GEA_BACKEND', '').lower() != 'python':
+    try:
+        from . import _geohash_c as _c
+    except ImportError:
+        _c = None
+    try:
+        from . import _geohash_nb as _nb
+    except ImportError:
+        _nb = None
 
 __base32 = '0123456789bcdefghjkmnpqrstuvwxyz'
 __decodemap = {}
 for i in range(len(__base32)):
     __decodemap[__base32[i]] = i
 
-__neighbour = {
-    'n': ['p0r21436x8zb9dcf5h7kjnmqesgutwvy', 'bc01fg45238967deuvhjyznpkmstqrwx'],
-    's': ['14365h7k9dcfesgujnmqp0r2twvyx8zb', '238967debc01fg45kmstqrwxuvhjyznp'],
-    'e': ['bc01fg45238967deuvhjyznpkmstqrwx', 'p0r21436x8zb9dcf5h7kjnmqesgutwvy'],
-    'w': ['238967debc01fg45kmstqrwxuvhjyznp', '14365h7k9dcfesgujnmqp0r2twvyx8zb']
-}
+# split a 5-bit base32 value into its 1st/3rd/5th bits and its 2nd/4th bits
+_SPLIT5_FIRST = [((v >> 4 & 1) << 2) | ((v >> 2 & 1) << 1) | (v & 1) for v in range(32)]
+_SPLIT5_SECOND = [((v >> 3 & 1) << 1) | (v >> 1 & 1) for v in range(32)]
 
-__border = {
-    'n': ['prxz', 'bcfguvyz'],
-    's': ['028b', '0145hjnp'],
-    'e': ['bcfguvyz', 'prxz'],
-    'w': ['0145hjnp', '028b']
+# Morton LUT: spread the 8 bits of a byte to the even bit positions of a uint16
+_MORTON_LUT = [sum(((b >> i) & 1) << (2 * i) for i in range(8)) for b in range(256)]
+
+# (dlon, dlat) steps on the cell grid
+_ADJACENT_STEP = {'n': (0, 1), 's': (0, -1), 'e': (1, 0), 'w': (-1, 0)}
+
+# adjacency steps per neighbour direction, diagonals as two steps
+_NEIGHBOUR_STEPS = {
+    'nw': ('n', 'w'), 'n': ('n',), 'ne': ('n', 'e'),
+    'w': ('w',), 'e': ('e',),
+    'sw': ('s', 'w'), 's': ('s',), 'se': ('s', 'e')
 }
 
+# decimal digits of the cell centre per axis bit count, so decoding does
+# not recompute floor(2 - log10(delta)) on every call
+_DIGITS_LAT = [int(math.floor(2.0 - math.log(180.0 / 2 ** n) / math.log(10.0))) for n in range(64)]
+_DIGITS_LON = [int(math.floor(2.0 - math.log(360.0 / 2 ** n) / math.log(10.0))) for n in range(64)]
+
+
+def _geohash_to_bits(geohash: str):
+    """
+    De-interleave a geohash into its latitude and longitude cell indices.
+
+    :param geohash: geohash string
+    :return: (lat_int, lon_int, lat_bits, lon_bits)
+    """
+    lat_int = 0
+    lon_int = 0
+    lat_bits = 0
+    lon_bits = 0
+
+    for i in range(len(geohash)):
+        idx = __decodemap[geohash[i]]
+        if i % 2 == 0:
+            # character starts on a longitude bit
+            lon_int = (lon_int << 3) | _SPLIT5_FIRST[idx]
+            lat_int = (lat_int << 2) | _SPLIT5_SECOND[idx]
+            lon_bits += 3
+            lat_bits += 2
+        else:
+            # character starts on a latitude bit
+            lat_int = (lat_int << 3) | _SPLIT5_FIRST[idx]
+            lon_int = (lon_int << 2) | _SPLIT5_SECOND[idx]
+            lat_bits += 3
+            lon_bits += 2
+
+    return lat_int, lon_int, lat_bits, lon_bits
+
+
+def _spread_bits(x: int):
+    """
+    Spread the bits of x to the even bit positions, one byte at a time
+    through the Morton LUT.
+
+    :param x: integer to spread
+    :return: integer with bit i of x at bit 2*i
+    """
+    out = 0
+    shift = 0
+    while x:
+        out |= _MORTON_LUT[x & 0xff] << shift
+        x >>= 8
+        shift += 16
+    return out
+
+
+def _bits_to_geohash(lat_int: int, lon_int: int, lat_bits: int, lon_bits: int):
+    """
+    Re-interleave latitude and longitude cell indices into a geohash.
+
+    :param lat_int: latitude cell index
+    :param lon_int: longitude cell index
+    :param lat_bits: number of latitude bits
+    :param lon_bits: number of longitude bits
+    :return: geohash string
+    """
+    total = lat_bits + lon_bits
+    if total % 2 == 0:
+        # even total: the last interleaved bit is a latitude bit
+        code = (_spread_bits(lon_int) << 1) | _spread_bits(lat_int)
+    else:
+        # odd total: the last interleaved bit is a longitude bit
+        code = (_spread_bits(lat_int) << 1) | _spread_bits(lon_int)
+
+    precision = total // 5
+    return ''.join(__base32[(code >> 5 * (precision - 1 - i)) & 0x1f]
+                   for i in range(precision))
+
 
 def geohash_encode(loc: dict, precision=10):
     """
@@ -49,46 +144,111 @@ def geohash_encode(loc: dict, precision=10):
     if precision is None:
         raise ValueError('Invalid precision')
 
-    idx = 0
-    bit = 0
-    even_bit = True
-    geohash = ''
-
-    lat_min = -90.0
-    lat_max = 90.0
-    lon_min = -180.0
-    lon_max = 180.0
-
-    while len(geohash) < precision:
-        if even_bit:
-            # bisect E-W longitude
-            lon_mid = (lon_min + lon_max) / 2.0
-
-            if lon >= lon_mid:
-                idx = 2 * idx + 1
-                lon_min = lon_mid
-            else:
-                idx = 2 * idx
-                lon_max = lon_mid
-        else:
-            # bisect E-W longitude
-            lat_mid = (lat_min + lat_max) / 2.0
-            if lat >= lat_mid:
-                idx = 2 * idx + 1
-                lat_min = lat_mid
-            else:
-                idx = 2 * idx
-                lat_max = lat_mid
-        even_bit = not even_bit
-
-        bit += 1
-        if bit == 5:
-            # next character
-            geohash += __base32[idx]
-            bit = 0
-            idx = 0
+    if _c is not None and precision <= 32:
+        return _c.encode(lat, lon, precision)
+    if _nb is not None:
+        return _nb.encode(lat, lon, precision)
 
-    return geohash
+    # scale each axis to its cell index, then Morton-interleave through
+    # the LUT instead of bisecting one bit at a time
+    lat_bits = 5 * precision // 2
+    lon_bits = 5 * precision - lat_bits
+
+    lat_int = int((lat + 90.0) / 180.0 * (1 << lat_bits))
+    lon_int = int((lon + 180.0) / 360.0 * (1 << lon_bits))
+
+    # the upper boundary of the range falls into the last cell
+    lat_int = min(lat_int, (1 << lat_bits) - 1)
+    lon_int = min(lon_int, (1 << lon_bits) - 1)
+
+    return _bits_to_geohash(lat_int, lon_int, lat_bits, lon_bits)
+
+
+def geohash_encode_array(lat, lon, precision=10):
+    """
+    Geohash encode arrays of coordinates.
+
+    Requires numba; encoding runs in a compiled kernel parallelized
+    across points.
+
+    :param lat: numpy array of latitudes
+    :param lon: numpy array of longitudes
+    :param precision: length of the geohash strings
+    :return: numpy array of geohash byte strings
+    """
+    if _nb is None:
+        raise ImportError('numba is required for geohash_encode_array')
+    if precision is None:
+        raise ValueError('Invalid precision')
+
+    return _nb.encode_array(lat, lon, precision)
+
+
+def geohash_decode_array(geohashes):
+    """
+    Geohash decode an array of geohash byte strings.
+
+    Requires numba; decoding runs in a compiled kernel parallelized
+    across points.
+
+    :param geohashes: numpy array of geohash byte strings
+    :return: (lat, lon) numpy arrays of cell centres
+    """
+    if _nb is None:
+        raise ImportError('numba is required for geohash_decode_array')
+
+    return _nb.decode_array(geohashes)
+
+
+# immutable bounds of a cell, safe to share from the caches below
+Bounds = namedtuple('Bounds', ['sw_lat', 'sw_lon', 'ne_lat', 'ne_lon'])
+
+
+@lru_cache(maxsize=4096)
+def _geohash_bounds_cached(geohash: str):
+    """
+    Bounds of a validated, lowercase geohash; cached since neighbour
+    enumeration decodes the same small working set of cells repeatedly.
+
+    :param geohash: geohash string
+    :return: Bounds tuple
+    """
+    if _c is not None:
+        lat_min, lon_min, lat_max, lon_max = _c.bounds(geohash)
+        return Bounds(lat_min, lon_min, lat_max, lon_max)
+
+    lat_int, lon_int, lat_bits, lon_bits = _geohash_to_bits(geohash)
+
+    # the cell index and the bit count fully determine the bounds: the
+    # full range divided by 2^bits, offset by the index
+    lat_delta = 180.0 / (1 << lat_bits)
+    lon_delta = 360.0 / (1 << lon_bits)
+
+    lat_min = -90.0 + lat_int * lat_delta
+    lon_min = -180.0 + lon_int * lon_delta
+
+    return Bounds(lat_min, lon_min, lat_min + lat_delta, lon_min + lon_delta)
+
+
+@lru_cache(maxsize=4096)
+def _geohash_decode_cached(geohash: str):
+    """
+    Rounded cell centre of a validated, lowercase geohash.
+
+    :param geohash: geohash string
+    :return: (lat, lon) pair
+    """
+    b = _geohash_bounds_cached(geohash)
+
+    # determine the centre of the cell
+    lat = (b.sw_lat + b.ne_lat) / 2.0
+    lon = (b.sw_lon + b.ne_lon) / 2.0
+
+    # round to close to centre
+    lat_bits = 5 * len(geohash) // 2
+    lon_bits = 5 * len(geohash) - lat_bits
+
+    return round(lat, _DIGITS_LAT[lat_bits]), round(lon, _DIGITS_LON[lon_bits])
 
 
 def geohash_bounds(geohash: str):
@@ -103,46 +263,14 @@ def geohash_bounds(geohash: str):
     if len(geohash) == 0:
         raise ValueError('Invalid Geohash invalid')
 
-    geohash = geohash.lower()
-
-    even_bit = True
-    lat_min = -90.0
-    lat_max = 90.0
-    lon_min = -180.0
-    lon_max = 180.0
+    b = _geohash_bounds_cached(geohash.lower())
 
-    for i in range(len(geohash)):
-        char = geohash[i]
-        idx = __decodemap[char]
-        if idx == -1:
-            raise Exception('Invalid geohash')
-
-        for nn in range(4, -1, -1):
-            bit_n = idx >> nn & 1
-            if even_bit:
-                # longitude
-                lon_mid = (lon_min + lon_max) / 2.0
-                if bit_n == 1:
-                    lon_min = lon_mid
-                else:
-                    lon_max = lon_mid
-            else:
-                # latitude
-                lat_mid = (lat_min + lat_max) / 2.0
-                if bit_n == 1:
-                    lat_min = lat_mid
-                else:
-                    lat_max = lat_mid
-
-            even_bit = not even_bit
-
-    bounds = {
-        'sw': {'lat': lat_min, 'lon': lon_min},
-        'ne': {'lat': lat_max, 'lon': lon_max}
+    # a fresh dict per call; the cached tuple is immutable and shared
+    return {
+        'sw': {'lat': b.sw_lat, 'lon': b.sw_lon},
+        'ne': {'lat': b.ne_lat, 'lon': b.ne_lon}
     }
 
-    return bounds
-
 
 def geohash_decode(geohash):
     """
@@ -151,20 +279,12 @@ def geohash_decode(geohash):
     :param geohash: geohash string
     :return location dictionary
     """
-    bounds = geohash_bounds(geohash)
-
-    # determine the centre of the cell
-    lat_min = bounds['sw']['lat']
-    lon_min = bounds['sw']['lon']
-    lat_max = bounds['ne']['lat']
-    lon_max = bounds['ne']['lon']
+    if geohash is None:
+        raise ValueError('Invalid Geohash')
+    if len(geohash) == 0:
+        raise ValueError('Invalid Geohash invalid')
 
-    lat = (lat_min + lat_max) / 2.0
-    lon = (lon_min + lon_max) / 2.0
-
-    # round to close to centre
-    lat = round(lat, int(math.floor(2.0 - math.log(lat_max - lat_min) / math.log(10.0))))
-    lon = round(lon, int(math.floor(2.0 - math.log(lon_max - lon_min) / math.log(10.0))))
+    lat, lon = _geohash_decode_cached(geohash.lower())
 
     return {'lat': lat, 'lon': lon}
 
@@ -192,18 +312,17 @@ def geohash_adjacent(geohash: str, direction: str):
 
     geohash = geohash.lower()
 
-    last_ch = geohash[-1]
-    parent = geohash[:-1]
+    if _c is not None and len(geohash) <= 12:
+        return _c.adjacent(geohash, direction)
 
-    ttype = len(geohash) % 2
+    lat_int, lon_int, lat_bits, lon_bits = _geohash_to_bits(geohash)
+    dlon, dlat = _ADJACENT_STEP[direction]
 
-    try:
-        if __border[direction][ttype].index(last_ch) and parent != '':
-            parent = geohash_adjacent(parent, direction)
-    except ValueError:
-        pass
+    # step on the cell grid with modular wrap at the poles/antimeridian
+    lat_int = (lat_int + dlat) & ((1 << lat_bits) - 1)
+    lon_int = (lon_int + dlon) & ((1 << lon_bits) - 1)
 
-    return parent + __base32[__neighbour[direction][ttype].index(last_ch)]
+    return _bits_to_geohash(lat_int, lon_int, lat_bits, lon_bits)
 
 
 def geohash_neighbour(geohash: str, direction: str):
@@ -225,45 +344,13 @@ def geohash_neighbour(geohash: str, direction: str):
         raise ValueError('Invalid direction')
 
     direction = direction.lower()
-    if direction not in ['nw', 'n', 'ne',
-                         'e', 'w',
-                         'sw', 's', 'se']:
+    if direction not in _NEIGHBOUR_STEPS:
         raise ValueError('Invalid direction')
 
-    def adj_nw():
-        return geohash_adjacent(geohash_adjacent(geohash, 'n'), 'w')
-
-    def adj_n():
-        return geohash_adjacent(geohash, 'n')
-
-    def adj_ne():
-        return geohash_adjacent(geohash_adjacent(geohash, 'n'), 'e')
-
-    def adj_w():
-        return geohash_adjacent(geohash, 'w')
-
-    def adj_e():
-        return geohash_adjacent(geohash, 'e')
+    for step in _NEIGHBOUR_STEPS[direction]:
+        geohash = geohash_adjacent(geohash, step)
 
-    def adj_sw():
-        return geohash_adjacent(geohash_adjacent(geohash, 's'), 'w')
-
-    def adj_s():
-        return geohash_adjacent(geohash, 's')
-
-    def adj_se():
-        return geohash_adjacent(geohash_adjacent(geohash, 's'), 'e')
-
-    options = {'nw': adj_nw,
-               'n': adj_n,
-               'ne': adj_ne,
-               'w': adj_w,
-               'e': adj_e,
-               'sw': adj_sw,
-               's': adj_s,
-               'se': adj_se}
-
-    return options[direction]()
+    return geohash
 
 
 def geohash_neighbours(geohash: str):
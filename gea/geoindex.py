@@ -0,0 +1,121 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Aug 31 09:12:00 2026
+
+@author: Alessandro Adamo
+"""
+from .geohash import geohash_decode, geohash_encode, geohash_neighbours
+from .location import haversine_prepared, prepare
+
+# smallest cell dimension in km per geohash precision; used to pick the
+# coarsest precision whose cell still covers a query radius
+_CELL_MIN_KM = [5000.0, 625.0, 156.0, 19.5, 4.89, 0.61, 0.153, 0.0191, 0.00477, 0.000596, 0.000149, 0.0000186]
+
+
+def _radius_precision(km: float):
+    """
+    Precision whose cells are still at least km wide, so a cell and its
+    8 neighbours cover a disc of that radius around any inner point.
+
+    :param km: radius expressed in kilometers
+    :return: geohash precision
+    """
+    precision = 1
+    for i in range(len(_CELL_MIN_KM)):
+        if _CELL_MIN_KM[i] >= km:
+            precision = i + 1
+        else:
+            break
+
+    return precision
+
+
+class GeohashIndex:
+    """
+    Prefix index over geohashed locations.
+
+    Payloads are stored in a trie keyed by base32 characters; every node
+    also keeps the list of all payloads below it, so enumerating a
+    subtree is a single list read instead of a traversal. Proximity
+    queries hash the query point, union the prefix lists of its cell and
+    the 8 neighbour cells, and filter the few candidates by Haversine
+    distance instead of scanning the whole dataset.
+    """
+
+    def __init__(self):
+        self._root = {'children': {}, 'items': []}
+
+    def add(self, geohash: str, payload):
+        """
+        Add a payload under a geohash.
+
+        :param geohash: geohash string
+        :param payload: payload to index
+        """
+        if geohash is None:
+            raise ValueError('Invalid Geohash')
+        if len(geohash) == 0:
+            raise ValueError('Invalid Geohash')
+
+        geohash = geohash.lower()
+
+        item = (geohash, payload)
+
+        node = self._root
+        node['items'].append(item)
+        for char in geohash:
+            if char not in node['children']:
+                node['children'][char] = {'children': {}, 'items': []}
+            node = node['children'][char]
+            node['items'].append(item)
+
+    def query_prefix(self, prefix: str):
+        """
+        All payloads whose geohash starts with the prefix.
+
+        :param prefix: geohash prefix, empty for the whole index
+        :return: list of payloads
+        """
+        node = self._root
+        for char in prefix.lower():
+            if char not in node['children']:
+                return []
+            node = node['children'][char]
+
+        return [payload for _, payload in node['items']]
+
+    def query_radius_km(self, loc: dict, km: float):
+        """
+        All payloads within km of the location.
+
+        :param loc: location point
+        :param km: radius expressed in kilometers
+        :return: list of payloads
+        """
+        if km <= 0.0:
+            raise ValueError('Invalid radius')
+
+        centre = prepare(loc)
+
+        precision = _radius_precision(km)
+        cell = geohash_encode(loc, precision)
+        cells = [cell] + list(geohash_neighbours(cell).values())
+
+        dist = km * 1000.0
+
+        results = []
+        for cell in cells:
+            node = self._root
+            for char in cell:
+                if char not in node['children']:
+                    node = None
+                    break
+                node = node['children'][char]
+            if node is None:
+                continue
+
+            for geohash, payload in node['items']:
+                if haversine_prepared(centre, prepare(geohash_decode(geohash))) <= dist:
+                    results.append(payload)
+
+        return results
@@ -4,13 +4,30 @@ Created on Tue Oct 31 13:48:59 2017
 
 @author: Alessandro Adamo
 """
+from collections import namedtuple
 from math import *
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
 
-__WGS84 = dict(A=6378137.0, # equatorial radius
-               C=6356752.3, # polar radius
-               R=(2.0 * 6378137.0 + 6356752.3) / 3.0, # mean radius
-               F=(6378137.0 - 6356752.3) / 6378137.0) # flatness
+try:
+    from . import _location_nb as _nb
+except ImportError:
+    # numba/numpy are optional; fall back to the NumPy/pure-Python paths
+    _nb = None
+
+
+_A = 6378137.0  # equatorial radius
+_C = 6356752.3  # polar radius
+_R = (2.0 * _A + _C) / 3.0  # mean radius
+_F = (_A - _C) / _A  # flatness
+
+_R2 = _R * _R
+_INV_R = 1.0 / _R
+
+__WGS84 = dict(A=_A, C=_C, R=_R, F=_F)
 
 
 def radius_spheroid(lat: float):
@@ -24,96 +41,203 @@ def radius_spheroid(lat: float):
     if not -90.0 <= lat <= +90.0:
         raise ValueError('Invalid location latitude')
 
-    return __WGS84['A'] * (1.0 - __WGS84['F'] * sin(radians(lat)) ** 2.0)
+    s = sin(radians(lat))
 
+    return _A * (1.0 - _F * s * s)
 
-def haversine(loc1: dict, loc2: dict):
-    """
-    Haversine distance
 
-    :param loc1: location point
-    :param loc2: location point
-    :return: Haversine distance
+def _check_loc(loc: dict):
     """
-    if 'lat' not in loc1 or 'lon' not in loc1:
-        raise TypeError('Invalid location')
+    Validate a location point in a single pass.
 
-    if 'lat' not in loc2 or 'lon' not in loc2:
+    :param loc: location point
+    :return: (lat, lon) pair
+    """
+    if 'lat' not in loc or 'lon' not in loc:
         raise TypeError('Invalid location')
 
-    if (not isinstance(loc1['lat'], float)) or (not isinstance(loc1['lon'], float)):
-        raise TypeError('Invalid location')
+    lat = loc['lat']
+    lon = loc['lon']
 
-    if (not isinstance(loc2['lat'], float)) or (not isinstance(loc2['lon'], float)):
+    if (not isinstance(lat, float)) or (not isinstance(lon, float)):
         raise TypeError('Invalid location')
 
-    if not -90.0 <= loc1['lat'] <= +90.0:
+    if not -90.0 <= lat <= +90.0:
         raise ValueError('Invalid location latitude')
 
-    if not -180.0 <= loc1['lon'] <= +180.0:
+    if not -180.0 <= lon <= +180.0:
         raise ValueError('Invalid location longitude')
 
-    if not -90.0 <= loc2['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
+    return lat, lon
 
-    if not -180.0 <= loc2['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
 
-    lat1 = radians(loc1['lat'])
-    lon1 = radians(loc1['lon'])
-    lat2 = radians(loc2['lat'])
-    lon2 = radians(loc2['lon'])
+def _check_alt(loc: dict):
+    """
+    Validate the optional altitude of a location point.
+
+    :param loc: location point
+    :return: altitude, 0.0 when absent
+    """
+    if 'alt' not in loc:
+        return 0.0
+
+    if not isinstance(loc['alt'], float):
+        raise TypeError('Invalid altitude')
+
+    return loc['alt']
+
+
+# location with pre-converted radians and cached sin/cos of the latitude;
+# building it once per point avoids recomputing the same trig on every
+# distance/bearing call in proximity loops
+PreparedLocation = namedtuple('PreparedLocation', ['lat_rad', 'lon_rad', 'sin_lat', 'cos_lat'])
+
+
+def prepare(loc: dict):
+    """
+    Prepare a location point for repeated distance/bearing queries by
+    caching its radians and the sin/cos of its latitude.
+
+    :param loc: location point
+    :return: PreparedLocation tuple
+    """
+    lat, lon = _check_loc(loc)
+
+    lat_rad = radians(lat)
+    lon_rad = radians(lon)
 
+    return PreparedLocation(lat_rad, lon_rad, sin(lat_rad), cos(lat_rad))
+
+
+def _haversine_raw(lat1: float, lon1: float, lat2: float, lon2: float):
+    """
+    Haversine distance kernel; coordinates expressed in radians, no
+    validation.
+
+    :return: Haversine distance
+    """
     delta_lat = lat2 - lat1
     delta_lon = lon2 - lon1
 
-    a = sin(delta_lat / 2.0) ** 2 + cos(lat1) * cos(lat2) * sin(delta_lon / 2.0) ** 2
+    sdlat = sin(delta_lat / 2.0)
+    sdlon = sin(delta_lon / 2.0)
+
+    a = sdlat * sdlat + cos(lat1) * cos(lat2) * sdlon * sdlon
     c = 2.0 * asin(sqrt(a))
 
-    return __WGS84['R'] * c
+    return _R * c
 
 
-def haversine_approximation(loc1: dict, loc2: dict):
+def haversine(loc1: dict, loc2: dict):
     """
-    Haversine distance approximated by Euclidean distance
+    Haversine distance
 
     :param loc1: location point
     :param loc2: location point
     :return: Haversine distance
     """
-    if 'lat' not in loc1 or 'lon' not in loc1:
-        raise TypeError('Invalid location')
+    lat1, lon1 = _check_loc(loc1)
+    lat2, lon2 = _check_loc(loc2)
 
-    if 'lat' not in loc2 or 'lon' not in loc2:
-        raise TypeError('Invalid location')
+    return _haversine_raw(radians(lat1), radians(lon1), radians(lat2), radians(lon2))
 
-    if (not isinstance(loc1['lat'], float)) or (not isinstance(loc1['lon'], float)):
-        raise TypeError('Invalid location')
 
-    if (not isinstance(loc2['lat'], float)) or (not isinstance(loc2['lon'], float)):
-        raise TypeError('Invalid location')
+def haversine_array(lat1, lon1, lat2, lon2, fp32=False):
+    """
+    Haversine distance over arrays of coordinates (structure-of-arrays
+    layout). Coordinates are expected already converted to radians.
+
+    Uses the compiled numba kernel when available, otherwise a fused
+    NumPy expression. With fp32=True the whole computation runs in
+    float32: half the memory traffic and twice the SIMD lanes, with a
+    precision of roughly a metre at Earth radius.
+
+    :param lat1: numpy array of latitudes expressed in radians
+    :param lon1: numpy array of longitudes expressed in radians
+    :param lat2: numpy array of latitudes expressed in radians
+    :param lon2: numpy array of longitudes expressed in radians
+    :param fp32: run in float32 instead of float64
+    :return: numpy array of Haversine distances
+    """
+    if np is None:
+        raise ImportError('numpy is required for haversine_array')
 
-    if not -90.0 <= loc1['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
+    dtype = np.float32 if fp32 else np.float64
 
-    if not -180.0 <= loc1['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
+    if _nb is not None:
+        return _nb.haversine_array(lat1, lon1, lat2, lon2, dtype)
 
-    if not -90.0 <= loc2['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
+    lat1 = np.asarray(lat1, dtype=dtype)
+    lon1 = np.asarray(lon1, dtype=dtype)
+    lat2 = np.asarray(lat2, dtype=dtype)
+    lon2 = np.asarray(lon2, dtype=dtype)
 
-    if not -180.0 <= loc2['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
+    dlat = lat2 - lat1
+    dlon = lon2 - lon1
+    sdlat = np.sin(dlat * 0.5)
+    sdlon = np.sin(dlon * 0.5)
+    a = sdlat * sdlat + np.cos(lat1) * np.cos(lat2) * sdlon * sdlon
+    return _R * 2.0 * np.arcsin(np.sqrt(a))
+
+
+def haversine_prepared(p1: PreparedLocation, p2: PreparedLocation):
+    """
+    Haversine distance between two prepared locations; reuses the cached
+    cos of both latitudes.
+
+    :param p1: prepared location point
+    :param p2: prepared location point
+    :return: Haversine distance
+    """
+    sdlat = sin((p2.lat_rad - p1.lat_rad) / 2.0)
+    sdlon = sin((p2.lon_rad - p1.lon_rad) / 2.0)
+
+    a = sdlat * sdlat + p1.cos_lat * p2.cos_lat * sdlon * sdlon
+
+    return _R * 2.0 * asin(sqrt(a))
 
-    lat1 = radians(loc1['lat'])
-    lon1 = radians(loc1['lon'])
-    lat2 = radians(loc2['lat'])
-    lon2 = radians(loc2['lon'])
 
+def _haversine_approximation_raw(lat1: float, lon1: float, lat2: float, lon2: float):
+    """
+    Equirectangular approximation kernel; coordinates expressed in
+    radians, no validation.
+
+    :return: Haversine distance approximated by Euclidean distance
+    """
     x = (lon2 - lon1) * cos(0.5 * (lat2 + lat1))
     y = lat2 - lat1
 
-    return __WGS84['R'] * sqrt(x*x + y*y)
+    return _R * sqrt(x*x + y*y)
+
+
+def haversine_approximation(loc1: dict, loc2: dict):
+    """
+    Haversine distance approximated by Euclidean distance
+
+    :param loc1: location point
+    :param loc2: location point
+    :return: Haversine distance
+    """
+    lat1, lon1 = _check_loc(loc1)
+    lat2, lon2 = _check_loc(loc2)
+
+    return _haversine_approximation_raw(radians(lat1), radians(lon1), radians(lat2), radians(lon2))
+
+
+def _bearing_raw(lat1: float, lon1: float, lat2: float, lon2: float):
+    """
+    Bearing kernel; coordinates expressed in radians, no validation.
+
+    :return: bearing in [0, 360), a due-north bearing is 0.0
+    """
+    delta_lon = lon2 - lon1
+    clat2 = cos(lat2)
+    y = sin(delta_lon) * clat2
+    x = cos(lat1) * sin(lat2) - \
+        sin(lat1) * clat2 * cos(delta_lon)
+
+    # branchless wrap of the signed angle; vectorizes in the array paths
+    return (degrees(atan2(y, x)) + 360.0) % 360.0
 
 
 def bearing(loc1: dict, loc2: dict):
@@ -124,46 +248,44 @@ def bearing(loc1: dict, loc2: dict):
     :param loc2: location point
     :return: bearing
     """
-    if 'lat' not in loc1 or 'lon' not in loc1:
-        raise TypeError('Invalid location')
-
-    if 'lat' not in loc2 or 'lon' not in loc2:
-        raise TypeError('Invalid location')
-
-    if (not isinstance(loc1['lat'], float)) or (not isinstance(loc1['lon'], float)):
-        raise TypeError('Invalid location')
+    lat1, lon1 = _check_loc(loc1)
+    lat2, lon2 = _check_loc(loc2)
 
-    if (not isinstance(loc2['lat'], float)) or (not isinstance(loc2['lon'], float)):
-        raise TypeError('Invalid location')
+    return _bearing_raw(radians(lat1), radians(lon1), radians(lat2), radians(lon2))
 
-    if not -90.0 <= loc1['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
 
-    if not -180.0 <= loc1['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
+def bearing_prepared(p1: PreparedLocation, p2: PreparedLocation):
+    """
+    Bearing between two prepared locations; reuses the cached sin/cos of
+    both latitudes.
 
-    if not -90.0 <= loc2['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
+    :param p1: prepared location point
+    :param p2: prepared location point
+    :return: bearing in [0, 360), a due-north bearing is 0.0
+    """
+    delta_lon = p2.lon_rad - p1.lon_rad
+    y = sin(delta_lon) * p2.cos_lat
+    x = p1.cos_lat * p2.sin_lat - \
+        p1.sin_lat * p2.cos_lat * cos(delta_lon)
 
-    if not -180.0 <= loc2['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
+    return (degrees(atan2(y, x)) + 360.0) % 360.0
 
-    lat1 = radians(loc1['lat'])
-    lon1 = radians(loc1['lon'])
-    lat2 = radians(loc2['lat'])
-    lon2 = radians(loc2['lon'])
 
-    delta_lon = lon2 - lon1
-    clat2 = cos(lat2)
-    y = sin(delta_lon) * clat2
-    x = cos(lat1) * sin(lat2) - \
-        sin(lat1) * clat2 * cos(delta_lon)
+def _destination_raw(lat1: float, lon1: float, dist: float, brng: float):
+    """
+    Destination point kernel; coordinates and bearing expressed in
+    radians, no validation.
 
-    brng = degrees(atan2(y, x))
-    if brng < 0.0:
-        brng = 360.0 + brng
+    :return: (lat, lon) destination expressed in radians
+    """
+    dr = dist * _INV_R
+    lat2 = asin(sin(lat1) * cos(dr) +
+                cos(lat1) * sin(dr) * cos(brng))
+    y = sin(brng) * sin(dr) * cos(lat1)
+    x = cos(dr) - sin(lat1) * sin(lat2)
+    lon2 = lon1 + atan2(y, x)
 
-    return brng
+    return lat2, lon2
 
 
 def destination(loc: dict, dist: float, bearing: float):
@@ -175,33 +297,31 @@ def destination(loc: dict, dist: float, bearing: float):
     :param bearing: bearing expressed in degrees
     :return: destination point
     """
-    if 'lat' not in loc or 'lon' not in loc:
-        raise TypeError('Invalid location')
+    lat, lon = _check_loc(loc)
 
-    if (not isinstance(loc['lat'], float)) or (not isinstance(loc['lon'], float)):
-        raise TypeError('Invalid location')
+    if not 0.0 <= bearing <= 360.0:
+        raise ValueError('Invalid location longitude')
 
-    if not -90.0 <= loc['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
+    lat2, lon2 = _destination_raw(radians(lat), radians(lon), dist, radians(bearing))
 
-    if not -180.0 <= loc['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
+    return {'lat': degrees(lat2), 'lon': degrees(lon2)}
 
-    if not 0.0 <= bearing <= 360.0:
-        raise ValueError('Invalid location longitude')
 
-    lat1 = radians(loc['lat'])
-    lon1 = radians(loc['lon'])
-    brng = radians(bearing)
+def _latlon_to_cartesian_raw(lat: float, lon: float, alt: float):
+    """
+    Cartesian conversion kernel; coordinates expressed in radians, no
+    validation.
 
-    dr = dist / __WGS84['R']
-    lat2 = asin(sin(lat1) * cos(dr) +
-                cos(lat1) * sin(dr) * cos(brng))
-    y = sin(brng) * sin(dr) * cos(lat1)
-    x = cos(dr) - sin(lat1) * sin(lat2)
-    lon2 = lon1 + atan2(y, x)
+    :return: (x, y, z) 3D Cartesian coordinates
+    """
+    slat = sin(lat)
+    clat = cos(lat)
+    slong = sin(lon)
+    clong = cos(lon)
 
-    return {'lat': degrees(lat2), 'lon': degrees(lon2)}
+    r = _R + alt
+
+    return r * clat * clong, r * clat * slong, r * slat
 
 
 def latlon_to_cartesian(loc: dict):
@@ -211,39 +331,60 @@ def latlon_to_cartesian(loc: dict):
     :param loc: location point
     :return: 3D Cartesian coordinates
     """
-    if 'lat' not in loc or 'lon' not in loc:
-        raise TypeError('Invalid location')
+    lat, lon = _check_loc(loc)
+    alt = _check_alt(loc)
 
-    if (not isinstance(loc['lat'], float)) or (not isinstance(loc['lon'], float)):
-        raise TypeError('Invalid location')
+    x, y, z = _latlon_to_cartesian_raw(radians(lat), radians(lon), alt)
 
-    if not -90.0 <= loc['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
+    return {'x': x, 'y': y, 'z': z}
 
-    if not -180.0 <= loc['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
 
-    lat1 = radians(loc['lat'])
-    lon1 = radians(loc['lon'])
+def latlon_to_cartesian_array(lat, lon, alt=None, fp32=False):
+    """
+    Convert arrays of latitude/longitude coordinates to 3D Cartesian
+    coordinates (structure-of-arrays layout). Coordinates are expected
+    already converted to radians.
+
+    With fp32=True the computation runs in float32, trading roughly a
+    metre of precision at Earth radius for half the memory traffic.
+
+    :param lat: numpy array of latitudes expressed in radians
+    :param lon: numpy array of longitudes expressed in radians
+    :param alt: optional numpy array of altitudes expressed in meters
+    :param fp32: run in float32 instead of float64
+    :return: (x, y, z) numpy arrays of 3D Cartesian coordinates
+    """
+    if np is None:
+        raise ImportError('numpy is required for latlon_to_cartesian_array')
 
-    slat = sin(lat1)
-    clat = cos(lat1)
-    slong = sin(lon1)
-    clong = cos(lon1)
+    dtype = np.float32 if fp32 else np.float64
 
-    if 'alt' in loc:
-        if not isinstance(loc['alt'], float):
-            raise TypeError('Invalid location altitude')
+    lat = np.asarray(lat, dtype=dtype)
+    lon = np.asarray(lon, dtype=dtype)
 
-        x = (__WGS84['R'] + loc['alt']) * clat * clong
-        y = (__WGS84['R'] + loc['alt']) * clat * slong
-        z = (__WGS84['R'] + loc['alt']) * slat
+    if alt is None:
+        r = dtype(_R)
     else:
-        x = __WGS84['R'] * clat * clong
-        y = __WGS84['R'] * clat * slong
-        z = __WGS84['R'] * slat
+        r = _R + np.asarray(alt, dtype=dtype)
 
-    return {'x': x, 'y': y, 'z': z}
+    rclat = r * np.cos(lat)
+
+    return rclat * np.cos(lon), rclat * np.sin(lon), r * np.sin(lat)
+
+
+def _cartesian_to_latlon_raw(x: float, y: float, z: float):
+    """
+    Inverse Cartesian conversion kernel; no validation.
+
+    :return: (lat, lon, alt) with lat/lon expressed in degrees
+    """
+    r = sqrt(x * x + y * y + z * z)
+
+    alt = r - _R
+    lon = degrees(atan2(y, x))
+    lat = degrees(asin(z / r))
+
+    return lat, lon, alt
 
 
 def cartesian_to_latlon(car: dict):
@@ -256,11 +397,7 @@ def cartesian_to_latlon(car: dict):
     if 'x' not in car or 'y' not in car or 'z' not in car:
         raise TypeError('Invalid cartesian')
 
-    r = sqrt(car['x'] ** 2.0 + car['y'] ** 2.0 + car['z'] ** 2.0)
-
-    alt = r - __WGS84['R']
-    lon = atan2(car['y'], car['x']) * 360.0 / (2.0 * pi)
-    lat = asin(car['z'] / r) * 360.0 / (2.0 * pi)
+    lat, lon, alt = _cartesian_to_latlon_raw(car['x'], car['y'], car['z'])
 
     return {'lat': lat, 'lon': lon, 'alt': alt}
 
@@ -273,54 +410,30 @@ def midpoint(loc1: dict, loc2: dict):
     :param loc2: location point
     :return: half-way point
     """
-    if 'lat' not in loc1 or 'lon' not in loc1:
-        raise TypeError('Invalid location')
+    lat1, lon1 = _check_loc(loc1)
+    lat2, lon2 = _check_loc(loc2)
+    alt1 = _check_alt(loc1)
+    alt2 = _check_alt(loc2)
 
-    if 'lat' not in loc2 or 'lon' not in loc2:
-        raise TypeError('Invalid location')
-
-    if (not isinstance(loc1['lat'], float)) or (not isinstance(loc1['lon'], float)):
-        raise TypeError('Invalid location')
-
-    if (not isinstance(loc2['lat'], float)) or (not isinstance(loc2['lon'], float)):
-        raise TypeError('Invalid location')
-
-    if not -90.0 <= loc1['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
-
-    if not -180.0 <= loc1['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
-
-    if not -90.0 <= loc2['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
-
-    if not -180.0 <= loc2['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
-
-    c1 = latlon_to_cartesian(loc1)
-    c2 = latlon_to_cartesian(loc2)
+    x1, y1, z1 = _latlon_to_cartesian_raw(radians(lat1), radians(lon1), alt1)
+    x2, y2, z2 = _latlon_to_cartesian_raw(radians(lat2), radians(lon2), alt2)
 
-    loc = cartesian_to_latlon({'x': 0.5 * (c1['x'] + c2['x']),
-                               'y': 0.5 * (c1['y'] + c2['y']),
-                               'z': 0.5 * (c1['z'] + c2['z'])})
+    lat, lon, _ = _cartesian_to_latlon_raw(0.5 * (x1 + x2),
+                                           0.5 * (y1 + y2),
+                                           0.5 * (z1 + z2))
 
-    if 'alt' in loc1:
-        if not isinstance(loc1['alt'], float):
-            raise TypeError('Invalid altitude')
-        alt1 = loc1['alt']
-    else:
-        alt1 = 0.0
+    return {'lat': lat, 'lon': lon, 'alt': 0.5 * (alt1 + alt2)}
 
-    if 'alt' in loc2:
-        if not isinstance(loc2['alt'], float):
-            raise TypeError('Invalid altitude')
-        alt2 = loc2['alt']
-    else:
-        alt2 = 0.0
 
-    loc['alt'] = 0.5 * (alt1 + alt2)
+def _angle_between_raw(x1: float, y1: float, z1: float, x2: float, y2: float, z2: float):
+    """
+    Angle kernel over 3D Cartesian coordinates; no validation.
 
-    return loc
+    :return: the angle between the two points expressed in radians
+    """
+    # the normalized dot product is the cosine of the angle; clamp it
+    # against rounding before acos
+    return acos(max(-1.0, min(1.0, (x1 * x2 + y1 * y2 + z1 * z2) / _R2)))
 
 
 def angle_between(loc1: dict, loc2: dict):
@@ -332,34 +445,13 @@ def angle_between(loc1: dict, loc2: dict):
     :param loc2: location point
     :return: the angle between this point and location point passed as argument
     """
-    if 'lat' not in loc1 or 'lon' not in loc1:
-        raise TypeError('Invalid location')
-
-    if 'lat' not in loc2 or 'lon' not in loc2:
-        raise TypeError('Invalid location')
-
-    if (not isinstance(loc1['lat'], float)) or (not isinstance(loc1['lon'], float)):
-        raise TypeError('Invalid location')
-
-    if (not isinstance(loc2['lat'], float)) or (not isinstance(loc2['lon'], float)):
-        raise TypeError('Invalid location')
-
-    if not -90.0 <= loc1['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
-
-    if not -180.0 <= loc1['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
-
-    if not -90.0 <= loc2['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
-
-    if not -180.0 <= loc2['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
+    lat1, lon1 = _check_loc(loc1)
+    lat2, lon2 = _check_loc(loc2)
 
-    c1 = latlon_to_cartesian(loc1)
-    c2 = latlon_to_cartesian(loc2)
+    x1, y1, z1 = _latlon_to_cartesian_raw(radians(lat1), radians(lon1), _check_alt(loc1))
+    x2, y2, z2 = _latlon_to_cartesian_raw(radians(lat2), radians(lon2), _check_alt(loc2))
 
-    return degrees((c1['x'] * c2['x'] + c1['y'] * c2['y'] + c1['z'] * c2['z']) / (__WGS84['R'] ** 2.0))
+    return _angle_between_raw(x1, y1, z1, x2, y2, z2)
 
 
 def interpolate_location(loc1: dict, loc2: dict, fraction: float):
@@ -372,69 +464,77 @@ def interpolate_location(loc1: dict, loc2: dict, fraction: float):
     :param fraction: the fraction of the distance between the two locations
     :return: interpolated location
     """
-    if 'lat' not in loc1 or 'lon' not in loc1:
-        raise TypeError('Invalid location')
-
-    if 'lat' not in loc2 or 'lon' not in loc2:
-        raise TypeError('Invalid location')
-
-    if (not isinstance(loc1['lat'], float)) or (not isinstance(loc1['lon'], float)):
-        raise TypeError('Invalid location')
-
-    if (not isinstance(loc2['lat'], float)) or (not isinstance(loc2['lon'], float)):
-        raise TypeError('Invalid location')
-
-    if not -90.0 <= loc1['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
-
-    if not -180.0 <= loc1['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
-
-    if not -90.0 <= loc2['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
-
-    if not -180.0 <= loc2['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
+    deg_lat1, deg_lon1 = _check_loc(loc1)
+    deg_lat2, deg_lon2 = _check_loc(loc2)
+    alt1 = _check_alt(loc1)
+    alt2 = _check_alt(loc2)
 
     if not 0.0 <= fraction <= 1.0:
         raise ValueError('Invalid fraction')
 
-    lat1 = radians(loc1['lat'])
-    lon1 = radians(loc1['lon'])
-    lat2 = radians(loc2['lat'])
-    lon2 = radians(loc2['lon'])
+    lat1 = radians(deg_lat1)
+    lon1 = radians(deg_lon1)
+    lat2 = radians(deg_lat2)
+    lon2 = radians(deg_lon2)
 
     cos_lat1 = cos(lat1)
     cos_lat2 = cos(lat2)
 
-    angle = radians(angle_between(loc1, loc2))
+    x1, y1, z1 = _latlon_to_cartesian_raw(lat1, lon1, alt1)
+    x2, y2, z2 = _latlon_to_cartesian_raw(lat2, lon2, alt2)
+
+    angle = _angle_between_raw(x1, y1, z1, x2, y2, z2)
     sin_angle = sin(angle)
-    a = sin((1.0 - fraction) * angle) / sin_angle
-    b = sin(fraction * angle) / sin_angle
+
+    if sin_angle == 0.0:
+        # coincident points; fall back to linear weights instead of
+        # dividing by the vanishing sine
+        a = 1.0 - fraction
+        b = fraction
+    else:
+        a = sin((1.0 - fraction) * angle) / sin_angle
+        b = sin(fraction * angle) / sin_angle
 
     x = a * cos_lat1 * cos(lon1) + b * cos_lat2 * cos(lon2)
     y = a * cos_lat1 * sin(lon1) + b * cos_lat2 * sin(lon2)
     z = a * sin(lat1) + b * sin(lat2)
 
-    loc = cartesian_to_latlon({'x': x, 'y': y, 'z': z})
+    lat, lon, _ = _cartesian_to_latlon_raw(x, y, z)
 
-    if 'alt' in loc1:
-        if not isinstance(loc1['alt'], float):
-            raise TypeError('Invalid altitude')
-        alt1 = loc1['alt']
-    else:
-        alt1 = 0.0
+    return {'lat': lat, 'lon': lon, 'alt': fraction * (alt1 + alt2)}
 
-    if 'alt' in loc2:
-        if not isinstance(loc2['alt'], float):
-            raise TypeError('Invalid altitude')
-        alt2 = loc2['alt']
-    else:
-        alt2 = 0.0
 
-    loc['alt'] = fraction * (alt1 + alt2)
+def track_distances_prepared(orig: PreparedLocation, dest: PreparedLocation, loc: PreparedLocation):
+    """
+    Cross track and along track distances between prepared locations,
+    computed together so the Haversine and the two bearings are evaluated
+    only once.
+
+    :param orig: prepared origin point
+    :param dest: prepared destination point
+    :param loc: prepared third point
+    :return: (cross track distance, along track distance) tuple
+    """
+    d_ol = haversine_prepared(orig, loc) * _INV_R
+    delta_b = radians(bearing_prepared(orig, dest)) - radians(bearing_prepared(orig, loc))
+
+    dxt = asin(sin(d_ol) * sin(delta_b)) * _R
+    atd = acos(cos(d_ol) / cos(dxt * _INV_R)) * _R
 
-    return loc
+    return dxt, atd
+
+
+def track_distances(orig: dict, dest: dict, loc: dict):
+    """
+    Cross track and along track distances of the point loc with respect to
+    the great circle path passing through the orig point and the dest point.
+
+    :param orig: origin point
+    :param dest: destination point
+    :param loc: third point
+    :return: (cross track distance, along track distance) tuple
+    """
+    return track_distances_prepared(prepare(orig), prepare(dest), prepare(loc))
 
 
 def cross_track_distance(orig: dict, dest: dict, loc: dict):
@@ -447,44 +547,7 @@ def cross_track_distance(orig: dict, dest: dict, loc: dict):
     :param loc: third point
     :return: cross track distance
     """
-    if 'lat' not in orig or 'lon' not in orig:
-        raise TypeError('Invalid location')
-
-    if 'lat' not in dest or 'lon' not in dest:
-        raise TypeError('Invalid location')
-
-    if 'lat' not in loc or 'lon' not in loc:
-        raise TypeError('Invalid location')
-
-    if (not isinstance(orig['lat'], float)) or (not isinstance(orig['lon'], float)):
-        raise TypeError('Invalid location')
-
-    if (not isinstance(dest['lat'], float)) or (not isinstance(dest['lon'], float)):
-        raise TypeError('Invalid location')
-
-    if (not isinstance(loc['lat'], float)) or (not isinstance(loc['lon'], float)):
-        raise TypeError('Invalid location')
-
-    if not -90.0 <= orig['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
-
-    if not -180.0 <= orig['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
-
-    if not -90.0 <= dest['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
-
-    if not -180.0 <= dest['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
-
-    if not -90.0 <= loc['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
-
-    if not -180.0 <= loc['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
-
-    return asin(sin(haversine(orig, loc) / __WGS84['R']) *
-                sin(radians(bearing(orig, dest)) - radians(bearing(orig, loc)))) * __WGS84['R']
+    return track_distances(orig, dest, loc)[0]
 
 
 def along_track_distance(orig: dict, dest: dict, loc: dict):
@@ -495,50 +558,35 @@ def along_track_distance(orig: dict, dest: dict, loc: dict):
     :param orig: origin point
     :param dest: destination point
     :param loc: third point
-    :return: cross track distance
+    :return: along track distance
     """
-    if 'lat' not in orig or 'lon' not in orig:
-        raise TypeError('Invalid location')
+    return track_distances(orig, dest, loc)[1]
 
-    if 'lat' not in dest or 'lon' not in dest:
-        raise TypeError('Invalid location')
-
-    if 'lat' not in loc or 'lon' not in loc:
-        raise TypeError('Invalid location')
-
-    if (not isinstance(orig['lat'], float)) or (not isinstance(orig['lon'], float)):
-        raise TypeError('Invalid location')
-
-    if (not isinstance(dest['lat'], float)) or (not isinstance(dest['lon'], float)):
-        raise TypeError('Invalid location')
 
-    if (not isinstance(loc['lat'], float)) or (not isinstance(loc['lon'], float)):
-        raise TypeError('Invalid location')
-
-    if not -90.0 <= orig['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
-
-    if not -180.0 <= orig['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
-
-    if not -90.0 <= dest['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
-
-    if not -180.0 <= dest['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
+def cross_track_distance_prepared(orig: PreparedLocation, dest: PreparedLocation, loc: PreparedLocation):
+    """
+    Cross track distance between prepared locations; reuses the cached
+    trig of all three points.
 
-    if not -90.0 <= loc['lat'] <= +90.0:
-        raise ValueError('Invalid location latitude')
+    :param orig: prepared origin point
+    :param dest: prepared destination point
+    :param loc: prepared third point
+    :return: cross track distance
+    """
+    return track_distances_prepared(orig, dest, loc)[0]
 
-    if not -180.0 <= loc['lon'] <= +180.0:
-        raise ValueError('Invalid location longitude')
 
-    d_ol = haversine(orig, loc) / __WGS84['R']
-    dxt = asin(sin(d_ol) *
-               sin(radians(bearing(orig, dest)) - radians(bearing(orig, loc)))) * __WGS84['R']
+def along_track_distance_prepared(orig: PreparedLocation, dest: PreparedLocation, loc: PreparedLocation):
+    """
+    Along track distance between prepared locations; reuses the cached
+    trig of all three points.
 
-    cross_track_distance(orig, dest, loc)
-    return acos(cos(d_ol) / cos(dxt / __WGS84['R'])) * __WGS84['R']
+    :param orig: prepared origin point
+    :param dest: prepared destination point
+    :param loc: prepared third point
+    :return: along track distance
+    """
+    return track_distances_prepared(orig, dest, loc)[1]
 
 
 if __name__ == "__main__":
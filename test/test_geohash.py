@@ -6,6 +6,7 @@ Created on Thu Nov 2 20:53:00 2017
 """
 import unittest
 from gea.geohash import *
+from gea import geohash as _geohash
 
 
 class TestGeoHash(unittest.TestCase):
@@ -15,6 +16,27 @@ class TestGeoHash(unittest.TestCase):
         self.assertEqual(geohash_encode(location, 5), 'sr2yk')
         self.assertEqual(geohash_encode(location, 6), 'sr2yk3')
 
+    @unittest.skipIf(_geohash._nb is None, 'requires numba')
+    def test_encode_decode_array(self):
+        import numpy as np
+
+        locations = [{'lat': 41.890251, 'lon': 12.492373},
+                     {'lat': 45.464211, 'lon': 9.191383},
+                     {'lat': -33.856784, 'lon': 151.215297}]
+
+        lat = np.array([loc['lat'] for loc in locations])
+        lon = np.array([loc['lon'] for loc in locations])
+
+        geohashes = geohash_encode_array(lat, lon, 9)
+        for i in range(len(locations)):
+            self.assertEqual(geohashes[i].decode('ascii'), geohash_encode(locations[i], 9))
+
+        lat_out, lon_out = geohash_decode_array(geohashes)
+        for i in range(len(locations)):
+            decoded = geohash_decode(geohash_encode(locations[i], 9))
+            self.assertEqual(lat_out[i], decoded['lat'])
+            self.assertEqual(lon_out[i], decoded['lon'])
+
     def test_bounds(self):
         self.assertEqual(geohash_bounds('sr2yk'), {'sw': {'lat': 41.8798828125, 'lon': 12.48046875}, 'ne': {'lat': 41.923828125, 'lon': 12.5244140625}})
 
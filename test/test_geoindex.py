@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Mon Aug 31 09:12:00 2026
+
+@author: Alessandro Adamo
+"""
+import unittest
+from gea.geohash import geohash_encode
+from gea.geoindex import GeohashIndex
+
+
+class TestGeohashIndex(unittest.TestCase):
+
+    def test_query_prefix(self):
+        index = GeohashIndex()
+        index.add('sr2yk3bsm', 'colosseum')
+        index.add('sr2yk3b17', 'forum')
+        index.add('u0nd9hsbn', 'duomo')
+
+        self.assertEqual(sorted(index.query_prefix('sr2yk3b')), ['colosseum', 'forum'])
+        self.assertEqual(index.query_prefix('u0'), ['duomo'])
+        self.assertEqual(index.query_prefix('z'), [])
+        self.assertEqual(sorted(index.query_prefix('')), ['colosseum', 'duomo', 'forum'])
+
+    def test_query_radius_km(self):
+        index = GeohashIndex()
+        # Colosseum - Rome
+        index.add(geohash_encode({'lat': 41.890251, 'lon': 12.492373}, 9), 'colosseum')
+        # Duomo - Milan
+        index.add(geohash_encode({'lat': 45.464211, 'lon': 9.191383}, 9), 'duomo')
+        # Pisa
+        index.add(geohash_encode({'lat': 43.7166667, 'lon': 10.3833333}, 9), 'pisa')
+
+        rome = {'lat': 41.9027835, 'lon': 12.4963655}
+        self.assertEqual(index.query_radius_km(rome, 5.0), ['colosseum'])
+        self.assertEqual(sorted(index.query_radius_km(rome, 500.0)), ['colosseum', 'duomo', 'pisa'])
+        self.assertEqual(index.query_radius_km({'lat': 48.8566, 'lon': 2.3522}, 5.0), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -14,6 +14,32 @@ class TestLocation(unittest.TestCase):
         self.assertEqual(radius_spheroid(90.0), 6356752.3)
         self.assertEqual(radius_spheroid(45.0), 6367444.65)
 
+    def test_angle_between(self):
+        # Colosseum - Rome
+        loc1 = {'lat': 41.890251, 'lon': 12.492373}
+        # Duomo - Milan
+        loc2 = {'lat': 45.464211, 'lon': 9.191383}
+
+        # the angle in radians scaled by the mean radius is the great circle distance
+        r = (2.0 * 6378137.0 + 6356752.3) / 3.0
+        self.assertAlmostEqual(r * angle_between(loc1, loc2), haversine(loc1, loc2), delta=1.0)
+        self.assertAlmostEqual(angle_between(loc1, loc1), 0.0, places=6)
+
+    def test_interpolate_location_coincident(self):
+        # Colosseum - Rome
+        loc = {'lat': 41.890251, 'lon': 12.492373, 'alt': 137.0}
+
+        mid = interpolate_location(loc, loc, 0.5)
+        self.assertAlmostEqual(mid['lat'], loc['lat'], places=6)
+        self.assertAlmostEqual(mid['lon'], loc['lon'], places=6)
+        self.assertAlmostEqual(mid['alt'], loc['alt'], places=6)
+
+        # within ~1 cm the angle rounds to zero as well
+        near = {'lat': loc['lat'], 'lon': loc['lon'] + 1e-7}
+        mid = interpolate_location(loc, near, 0.5)
+        self.assertAlmostEqual(mid['lat'], loc['lat'], places=6)
+        self.assertAlmostEqual(mid['lon'], loc['lon'], places=6)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file